@@ -1,10 +1,22 @@
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 import logging
 import argparse
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -12,7 +24,84 @@ logging.basicConfig(
     datefmt="%H:%M:%S"
 )
 
-def simulate_gbm(S0, mu, sigma, T, dt=1/252, paths=1, seed=None, log_returns=False):
+RNG_BLOCK_PATHS = 1024  # Paths per independent RNG stream (see _draw_normals)
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _gbm_kernel(S0, drift_coef, vol_step, t, Z, out):
+        # Walk the time steps row by row, with the paths of each row split across threads,
+        # so Z and out are read and written contiguously in their C order. cum holds each
+        # path's Brownian sum; vol_step is sigma * sqrt(dt), so only raw normals are summed.
+        # The sums are kept in float64 so long float32 paths don't drift, but are cast back
+        # to the array dtype so the exponent (and np.exp) stays in that dtype.
+        N, paths = Z.shape
+        cum = np.zeros(paths)
+        out[0, :] = S0
+        for i in range(N):
+            drift = drift_coef * t[i + 1]
+            for j in prange(paths):
+                cum[j] += Z[i, j]
+                out[i + 1, j] = S0 * np.exp(drift + vol_step * Z.dtype.type(cum[j]))
+
+def make_rng(seed=None, stream_id=0):
+    """
+    Creates a PCG64-backed Generator, optionally jumped ahead to an independent substream.
+    Parameters:
+        seed (int): Random seed
+        stream_id (int): Number of PCG64 jumps, each advancing the state by (phi - 1) * 2**128
+            steps; distinct ids give non-overlapping streams
+    Returns:
+        np.random.Generator: Generator to pass as `seed` to simulate_gbm
+    """
+    bit_generator = np.random.PCG64(seed)
+    if stream_id:
+        bit_generator = bit_generator.jumped(stream_id)
+    return np.random.Generator(bit_generator)
+
+def _get_array_module(backend):
+    if backend == "numpy":
+        return np
+    if backend == "cupy":
+        if cupy is None:
+            raise ImportError("backend='cupy' requires CuPy to be installed")
+        return cupy
+    raise ValueError(f"Unknown backend '{backend}', expected 'numpy' or 'cupy'")
+
+def _make_generator(xp, seed):
+    if xp is np:
+        return np.random.default_rng(seed)
+    return cupy.random.Generator(cupy.random.XORWOW(seed))
+
+def _draw_normals(xp, seed, N, paths, dtype, antithetic, n_workers=1):
+    if n_workers < 1:
+        raise ValueError("n_workers must be a positive integer")
+    if antithetic:
+        if paths % 2:
+            raise ValueError("paths must be even when antithetic=True")
+        Z = _draw_normals(xp, seed, N, paths // 2, dtype, False, n_workers)
+        return xp.concatenate([Z, -Z], axis=1)
+    if xp is not np or isinstance(seed, np.random.Generator):
+        if n_workers > 1:
+            raise ValueError("n_workers > 1 requires backend='numpy' and an integer seed or None")
+        return _make_generator(xp, seed).standard_normal((N, paths), dtype=dtype)
+
+    # One decorrelated child stream per fixed-size block of columns, so the draws depend
+    # only on the seed; n_workers just sets how many blocks are sampled concurrently
+    # (Generator releases the GIL while sampling).
+    sizes = [min(RNG_BLOCK_PATHS, paths - start) for start in range(0, paths, RNG_BLOCK_PATHS)]
+    if not sizes:
+        return np.empty((N, 0), dtype=dtype)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    draw = lambda child, size: np.random.default_rng(child).standard_normal((N, size), dtype=dtype)
+    if n_workers == 1 or len(sizes) == 1:
+        blocks = list(map(draw, root.spawn(len(sizes)), sizes))
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            blocks = list(executor.map(draw, root.spawn(len(sizes)), sizes))
+    return blocks[0] if len(blocks) == 1 else np.concatenate(blocks, axis=1)
+
+def simulate_gbm(S0, mu, sigma, T, dt=1/252, paths=1, seed=None, log_returns=False, dtype=np.float32,
+                 antithetic=False, backend="numpy", to_host=False, n_workers=1):
     """
     Simulates Geometric Brownian Motion (GBM) paths.
     Parameters:
@@ -22,29 +111,106 @@ def simulate_gbm(S0, mu, sigma, T, dt=1/252, paths=1, seed=None, log_returns=Fal
         T (float): Time horizon (in years)
         dt (float): Time step (default: 1 trading day)
         paths (int): Number of paths
-        seed (int): Random seed
+        seed (int or np.random.Generator): Random seed, or a Generator (see make_rng)
         log_returns (bool): Return log returns instead of prices
+        dtype (np.dtype): Floating point type of the output (float32 halves memory traffic)
+        antithetic (bool): Pair every path with its mirror (Z, -Z). Halves the normals
+            drawn and lowers Monte Carlo variance for monotone payoffs; paths must be even
+        backend (str): 'numpy' (CPU) or 'cupy' (GPU, worthwhile from ~10M samples)
+        to_host (bool): With backend='cupy', copy the results back to NumPy arrays
+        n_workers (int): Number of threads drawing the normals. Every RNG_BLOCK_PATHS
+            paths come from their own SeedSequence.spawn child stream, so results
+            depend only on the seed, not on n_workers
     Returns:
         (ndarray, ndarray): Tuple of (price/log-return matrix, time array)
     """
-    if seed is not None:
-        np.random.seed(seed)
+    xp = _get_array_module(backend)
+    if isinstance(seed, (int, np.integer)):
         logging.info(f"Seed set to {seed}")
 
+    dtype = np.dtype(dtype)
     N = int(T / dt)
-    t = np.linspace(0, T, N + 1)
+    t = xp.linspace(0, T, N + 1, dtype=dtype)
     logging.info(f"Simulating {paths} GBM path(s) over {N} steps")
 
-    W = np.random.standard_normal((N, paths))
-    W = np.vstack([np.zeros((1, paths)), np.cumsum(W * np.sqrt(dt), axis=0)])
-
-    drift = (mu - 0.5 * sigma**2) * t[:, None]
-    diffusion = sigma * W
-    S = S0 * np.exp(drift + diffusion)
+    Z = _draw_normals(xp, seed, N, paths, dtype, antithetic, n_workers)
+    sqrt_dt = math.sqrt(dt)
+    drift_coef = mu - 0.5 * sigma * sigma
+    S0, drift_coef, vol_step = (dtype.type(x) for x in (S0, drift_coef, sigma * sqrt_dt))
 
     if log_returns:
-        log_ret = np.diff(np.log(S), axis=0)
-        return log_ret, t[1:]
+        # log(S[i+1] / S[i]) = drift_coef * h + vol_step * Z[i] with h the grid spacing,
+        # so the returns come straight from the normals without building any prices
+        S = Z
+        S *= vol_step
+        S += drift_coef * dtype.type(T / max(N, 1))
+        t = t[1:]
+    elif xp is np and NUMBA_AVAILABLE:
+        S = np.empty((N + 1, paths), dtype=dtype)
+        _gbm_kernel(S0, drift_coef, vol_step, t, Z, S)
+    else:
+        # Build the Brownian path and the prices in a single preallocated buffer
+        S = xp.empty((N + 1, paths), dtype=dtype)
+        S[0] = 0
+        xp.cumsum(Z, axis=0, out=S[1:])
+        S[1:] *= vol_step
+        S += drift_coef * t[:, None]
+        xp.exp(S, out=S)
+        S *= S0
+
+    if to_host and xp is not np:
+        S, t = S.get(), t.get()
+    return S, t
+
+def simulate_gbm_batch(S0, mus, sigmas, T, dt=1/252, paths=1, seed=None, dtype=np.float32,
+                       antithetic=False, backend="numpy", to_host=False, n_workers=1):
+    """
+    Simulates GBM paths for K (mu, sigma) parameter sets in a single pass.
+    All parameter sets share the same normals (common random numbers), so a
+    sweep costs one RNG draw instead of K separate simulate_gbm calls.
+    Parameters:
+        S0 (float): Initial price
+        mus (array-like): K drifts (annual return)
+        sigmas (array-like): K volatilities
+        T, dt, paths, seed, dtype, antithetic, backend, to_host, n_workers: As in simulate_gbm
+    Returns:
+        (ndarray, ndarray): Tuple of (price array of shape (N+1, K, paths), time array)
+    """
+    xp = _get_array_module(backend)
+    dtype = np.dtype(dtype)
+    mus = xp.asarray(mus, dtype=dtype)
+    sigmas = xp.asarray(sigmas, dtype=dtype)
+    if mus.ndim != 1 or mus.shape != sigmas.shape:
+        raise ValueError("mus and sigmas must be 1-D sequences of equal length")
+    if mus.shape[0] == 0:
+        raise ValueError("mus and sigmas must contain at least one parameter set")
+
+    if isinstance(seed, (int, np.integer)):
+        logging.info(f"Seed set to {seed}")
+
+    K = mus.shape[0]
+    N = int(T / dt)
+    t = xp.linspace(0, T, N + 1, dtype=dtype)
+    logging.info(f"Simulating {paths} GBM path(s) over {N} steps for {K} parameter sets")
+
+    Z = _draw_normals(xp, seed, N, paths, dtype, antithetic, n_workers)
+    S0 = dtype.type(S0)
+    sqrt_dt = dtype.type(math.sqrt(dt))
+    drift_coefs = mus - 0.5 * sigmas * sigmas
+    vol_steps = sigmas * sqrt_dt
+
+    # Brownian path once in the first slot, then broadcast it across the batch
+    S = xp.empty((N + 1, K, paths), dtype=dtype)
+    S[0] = 0
+    xp.cumsum(Z, axis=0, out=S[1:, 0])
+    S[:, 1:] = S[:, :1]
+    S *= vol_steps[None, :, None]
+    S += drift_coefs[None, :, None] * t[:, None, None]
+    xp.exp(S, out=S)
+    S *= S0
+
+    if to_host and xp is not np:
+        S, t = S.get(), t.get()
     return S, t
 
 def plot_paths(S, t, title="GBM Simulation"):
@@ -60,9 +226,11 @@ def plot_paths(S, t, title="GBM Simulation"):
     plt.show()
 
 def save_to_csv(S, t, filename="gbm_output.csv"):
-    df = pd.DataFrame(S, index=t)
-    df.index.name = "Time"
-    df.to_csv(filename)
+    header = "Time," + ",".join(str(i) for i in range(S.shape[1]))
+    data = np.column_stack([t, S])
+    # Enough significant digits to round-trip the dtype: 9 for float32, 17 for float64
+    digits = math.ceil(1 + (np.finfo(data.dtype).nmant + 1) * math.log10(2))
+    np.savetxt(filename, data, fmt=f"%.{digits}g", delimiter=",", header=header, comments="")
     logging.info(f"Saved output to {filename}")
 
 if __name__ == "__main__":
@@ -75,6 +243,9 @@ if __name__ == "__main__":
     parser.add_argument("--log", action="store_true", help="Plot log returns instead of prices")
     parser.add_argument("--export", action="store_true", help="Export simulation to CSV")
     parser.add_argument("--seed", type=int, help="Random seed")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "cupy"], help="Array backend (cupy runs on the GPU)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of independent RNG streams to draw paths from")
+    parser.add_argument("--antithetic", action="store_true", help="Use antithetic path pairs (paths must be even)")
 
     args = parser.parse_args()
 
@@ -85,7 +256,11 @@ if __name__ == "__main__":
         T=args.T,
         paths=args.paths,
         seed=args.seed,
-        log_returns=args.log
+        log_returns=args.log,
+        antithetic=args.antithetic,
+        backend=args.backend,
+        to_host=True,
+        n_workers=args.workers
     )
 
     title = "Log Return Paths (GBM)" if args.log else "Simulated GBM Price Paths"
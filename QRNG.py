@@ -1,12 +1,30 @@
 import requests
+import functools
 import json
+import shelve
+import time
 import numpy as np
 import logging
-from typing import List, Literal
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Literal, Optional, Tuple
 
 QRNG_API_SOURCES = {
     "anu": "https://qrng.anu.edu.au/API/jsonI.php",
 }
+ANU_MAX_LENGTH = 1024  # Per-request cap of the ANU API
+MAX_WORKERS = 8
+MAX_RETRIES = 5
+QRNG_CACHE_PATH = ".qrng_cache"
+
+NUMPY_DTYPES = {
+    "uint8": np.uint8,
+    "uint16": np.uint16,
+}
+
+# Pooled session so concurrent chunk requests reuse keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
 
 # Setup logging
 logging.basicConfig(
@@ -15,25 +33,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def fetch_from_anu(length: int = 1, number_type: Literal['uint8', 'uint16'] = 'uint8') -> List[int]:
+def _fetch_chunk(length: int, number_type: str) -> List[int]:
     """
-    Fetch random numbers from the Australian National University QRNG API.
+    Fetch a single request's worth of numbers, backing off exponentially on HTTP 429.
     Args:
-        length (int): Number of random numbers to fetch.
+        length (int): Number of random numbers to fetch (at most ANU_MAX_LENGTH).
         number_type (str): Type of number: 'uint8' or 'uint16'.
     Returns:
         List[int]: List of quantum random numbers.
     """
-    
     url = f"{QRNG_API_SOURCES['anu']}?length={length}&type={number_type}"
-    try:
-        response = requests.get(url, timeout=10)
+    for attempt in range(MAX_RETRIES):
+        response = _SESSION.get(url, timeout=10)
+        if response.status_code == 429 and attempt < MAX_RETRIES - 1:
+            delay = 2 ** attempt
+            logger.warning(f"Rate limited by QRNG API, retrying in {delay}s")
+            time.sleep(delay)
+            continue
         response.raise_for_status()
         data = response.json()
         if data.get('success', False):
             return data['data']
-        else:
-            raise ValueError("QRNG API error: Data fetch unsuccessful.")
+        raise ValueError("QRNG API error: Data fetch unsuccessful.")
+
+def _fetch_remote(length: int, number_type: str) -> List[int]:
+    """
+    Fetch numbers from the API, splitting lengths above ANU_MAX_LENGTH into concurrent chunks.
+    """
+    chunks = [min(ANU_MAX_LENGTH, length - start) for start in range(0, length, ANU_MAX_LENGTH)]
+    if len(chunks) <= 1:
+        return _fetch_chunk(length, number_type)
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks))) as executor:
+        results = executor.map(lambda size: _fetch_chunk(size, number_type), chunks)
+        return [number for chunk in results for number in chunk]
+
+@functools.lru_cache(maxsize=128)
+def _fetch_cached(length: int, number_type: str, epoch: int) -> Tuple[int, ...]:
+    """
+    Fetch numbers once per (length, number_type, epoch), memoized in-process and on disk.
+    """
+    key = f"{length}:{number_type}:{epoch}"
+    with shelve.open(QRNG_CACHE_PATH) as cache:
+        if key in cache:
+            logger.info(f"Loaded {length} numbers from cache (epoch {epoch})")
+            return tuple(cache[key])
+    data = _fetch_remote(length, number_type)
+    with shelve.open(QRNG_CACHE_PATH) as cache:
+        cache[key] = data
+    return tuple(data)
+
+def _fetch_local(length: int, number_type: str) -> List[int]:
+    """
+    Pseudo-random stand-in used when the QRNG API cannot be reached.
+    """
+    high = 256 if number_type == 'uint8' else 65536
+    rng = np.random.default_rng()
+    return rng.integers(0, high, size=length, dtype=NUMPY_DTYPES[number_type]).tolist()
+
+def fetch_from_anu(length: int = 1, number_type: Literal['uint8', 'uint16'] = 'uint8',
+                   epoch: Optional[int] = None) -> List[int]:
+    """
+    Fetch random numbers from the Australian National University QRNG API.
+    Lengths above ANU_MAX_LENGTH are split into chunks fetched concurrently.
+    If the API is unreachable, falls back to NumPy's PRNG and logs a warning.
+    Args:
+        length (int): Number of random numbers to fetch.
+        number_type (str): Type of number: 'uint8' or 'uint16'.
+        epoch (int, optional): Cache tag. Calls with the same (length, number_type, epoch)
+            reuse one fetch across calls and runs; None always fetches fresh numbers.
+    Returns:
+        List[int]: List of quantum random numbers.
+    """
+    try:
+        if epoch is None:
+            return _fetch_remote(length, number_type)
+        return list(_fetch_cached(length, number_type, epoch))
+    except requests.ConnectionError as e:
+        logger.warning(f"QRNG API unreachable ({e}); falling back to pseudo-random numbers")
+        return _fetch_local(length, number_type)
     except Exception as e:
         logger.error(f"Error fetching quantum numbers: {e}")
         return []
@@ -52,15 +129,16 @@ def save_to_file(data: List[int], file_path: str) -> None:
     except Exception as e:
         logger.error(f"Failed to save data to {file_path}: {e}")
 
-def get_as_numpy_array(data: List[int]) -> np.ndarray:
+def get_as_numpy_array(data: List[int], number_type: Literal['uint8', 'uint16'] = 'uint8') -> np.ndarray:
     """
-    Convert list to NumPy array.
+    Convert list to a NumPy array of the native QRNG integer type.
     Args:
         data (List[int]): Random number list.
+        number_type (str): Type of number: 'uint8' or 'uint16'.
     Returns:
         np.ndarray: NumPy array of quantum numbers.
     """
-    return np.array(data)
+    return np.fromiter(data, dtype=NUMPY_DTYPES[number_type], count=len(data))
 
 if __name__ == "__main__":
     import argparse
@@ -69,16 +147,17 @@ if __name__ == "__main__":
     parser.add_argument("--length", type=int, default=10, help="Number of random numbers to fetch.")
     parser.add_argument("--type", type=str, default="uint8", choices=["uint8", "uint16"], help="Type of number.")
     parser.add_argument("--save", type=str, help="Optional path to save the numbers as JSON.")
+    parser.add_argument("--epoch", type=int, help="Cache tag; repeated runs with the same tag reuse cached numbers.")
     parser.add_argument("--numpy", action="store_true", help="Print NumPy array output.")
 
     args = parser.parse_args()
 
     logger.info(f"Fetching {args.length} quantum random numbers from ANU QRNG...")
-    result = fetch_from_anu(length=args.length, number_type=args.type)
+    result = fetch_from_anu(length=args.length, number_type=args.type, epoch=args.epoch)
 
     if args.numpy:
         logger.info("NumPy Array Output:")
-        print(get_as_numpy_array(result))
+        print(get_as_numpy_array(result, number_type=args.type))
     else:
         logger.info("Result:")
         print(result)
@@ -1,38 +1,166 @@
-import random
 import logging
-from typing import Dict, List
+from bisect import bisect_right
+from typing import Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def train_markov_chain(text: str, n: int = 2) -> Dict[str, List[str]]:
+# Shared by unseeded generate_text calls, so sampler loops don't build a Generator per call
+_RNG = np.random.default_rng()
+
+class MarkovModel(NamedTuple):
+    n: int  # n-gram (key) length
+    key_to_id: Dict[str, int]
+    chars: np.ndarray  # character id -> Unicode code point (uint32)
+    indptr: np.ndarray  # transitions of key k are [indptr[k], indptr[k + 1])
+    next_ids: np.ndarray  # character id of each transition
+    next_keys: np.ndarray  # key id each transition leads to
+    cum_probs: np.ndarray  # cumulative probability within each key's range
+    row_cache: Dict[int, Tuple[list, list, list]]  # per-key lists, filled by _generate_ids_py
+
+def _generate_ids_py(model, start_id, uniforms, out):
+    # Pure-Python twin of _generate_ids for when Numba is missing. A key's transitions
+    # become plain lists the first time it is visited and stay cached on the model, so
+    # each step is a bisect on a short list and no call converts the whole model.
+    rows = model.row_cache
+    key_id = start_id
+    generated = []
+    for u in uniforms.tolist():
+        row = rows.get(key_id)
+        if row is None:
+            lo, hi = model.indptr[key_id], model.indptr[key_id + 1]
+            row = rows[key_id] = (model.cum_probs[lo:hi].tolist(), model.next_ids[lo:hi].tolist(),
+                                  model.next_keys[lo:hi].tolist())
+        cum, chars, keys = row
+        if not cum:
+            break
+        j = bisect_right(cum, u)
+        generated.append(chars[j])
+        key_id = keys[j]
+    out[:len(generated)] = generated
+    return len(generated)
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _generate_ids(indptr, next_ids, next_keys, cum_probs, start_id, uniforms, out):
+        # Walk the chain purely on integer ids, consuming one pre-drawn uniform per step;
+        # returns how many characters were written
+        key_id = start_id
+        for i in range(out.shape[0]):
+            lo, hi = indptr[key_id], indptr[key_id + 1]
+            if lo == hi:
+                return i
+            j = lo + np.searchsorted(cum_probs[lo:hi], uniforms[i], side="right")
+            out[i] = next_ids[j]
+            key_id = next_keys[j]
+        return out.shape[0]
+
+def _unique_inverse(values: np.ndarray, bound: int) -> Tuple[np.ndarray, np.ndarray]:
+    # np.unique(values, return_inverse=True) for non-negative ints below bound. When the
+    # range is small next to the data, a lookup table replaces the O(L log L) sort.
+    if bound > 4 * len(values) + 65536:
+        return np.unique(values, return_inverse=True)
+    present = np.zeros(bound, dtype=bool)
+    present[values] = True
+    lookup = np.cumsum(present) - 1
+    return np.flatnonzero(present), lookup[values]
+
+def _occurrences(ids: np.ndarray, size: int) -> np.ndarray:
+    # Some position of each id in 0..size-1. A scatter is much cheaper than the
+    # stable sort np.unique(return_index=True) needs, and any occurrence will do.
+    positions = np.empty(size, dtype=np.int64)
+    positions[ids] = np.arange(len(ids))
+    return positions
+
+def finalize_model(n: int, key_to_id: Dict[str, int], chars: np.ndarray,
+                   window_ids: np.ndarray, next_char_ids: np.ndarray) -> MarkovModel:
+    # Count (key, next char) pairs and lay them out as CSR arrays: the transitions
+    # of key k are next_ids[indptr[k]:indptr[k + 1]], with matching cumulative
+    # probabilities so sampling is a binary search, and next_keys holding the id
+    # of the key each transition leads to. A key seen only at the very end of the
+    # text has an empty range, which ends generation.
+    num_chars = len(chars)
+    pair_codes = window_ids[:-1].astype(np.int64) * num_chars + next_char_ids
+    pairs, pair_ids = _unique_inverse(pair_codes, len(key_to_id) * num_chars)
+    counts = np.bincount(pair_ids, minlength=len(pairs))
+    pair_keys = pairs // num_chars
+    indptr = np.searchsorted(pair_keys, np.arange(len(key_to_id) + 1))
+
+    cum = np.concatenate(([0], np.cumsum(counts)))
+    offsets = cum[indptr[pair_keys]]
+    totals = cum[indptr[pair_keys + 1]] - offsets
+    cum_probs = ((cum[1:] - offsets) / totals).astype(np.float32)
+
+    return MarkovModel(
+        n=n,
+        key_to_id=key_to_id,
+        chars=chars.astype("<u4"),
+        indptr=indptr,
+        next_ids=(pairs % num_chars).astype(np.int32),
+        next_keys=window_ids[_occurrences(pair_ids, len(pairs)) + 1].astype(np.int32),
+        cum_probs=cum_probs,
+        row_cache={},
+    )
+
+def train_markov_chain(text: str, n: int = 2) -> MarkovModel:
     if n <= 0:
         raise ValueError("n must be a positive integer")
     if len(text) < n + 1:
         raise ValueError("Text is too short for the specified n-gram size")
 
-    model: Dict[str, List[str]] = {}
-    for i in range(len(text) - n):
-        key = text[i:i+n]
-        next_char = text[i+n]
-        model.setdefault(key, []).append(next_char)
+    # Work on code points (UTF-32) so n-grams stay character-level for any text
+    codepoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    vocab, char_ids = _unique_inverse(codepoints, int(codepoints.max()) + 1)
+
+    # Every n-gram as a row of a strided view over the character ids
+    windows = sliding_window_view(char_ids, n)
+    if len(vocab) ** n <= np.iinfo(np.int64).max:
+        # Pack each row into one exact base-V code so a 1-D unique applies
+        codes = windows @ (len(vocab) ** np.arange(n - 1, -1, -1, dtype=np.int64))
+        keys, window_ids = _unique_inverse(codes, len(vocab) ** n)
+    else:
+        # Codes would overflow int64: fall back to the (much slower) row-wise unique
+        keys, window_ids = np.unique(windows, axis=0, return_inverse=True)
+        window_ids = window_ids.reshape(-1)  # NumPy 2.0.0 returns a column here
+    key_positions = _occurrences(window_ids, len(keys))
+    key_to_id = {text[pos:pos+n]: key_id for key_id, pos in enumerate(key_positions.tolist())}
     
-    logging.info(f"Trained Markov model with {len(model)} keys using n={n}")
-    return model
+    logging.info(f"Trained Markov model with {len(key_to_id)} keys using n={n}")
+    return finalize_model(n, key_to_id, vocab, window_ids, char_ids[n:])
 
-def generate_text(model: Dict[str, List[str]], seed: str, length: int = 100) -> str:
-    n = len(next(iter(model)))  # infer n from model keys length
+def generate_text(model: MarkovModel, seed: str, length: int = 100,
+                  rng: Union[int, np.random.Generator, None] = None) -> str:
+    # rng seeds the sampling (an int or a Generator), so output is reproducible
+    n = model.n
     if len(seed) != n:
         raise ValueError(f"Seed length must be {n}")
 
-    output = seed
-    for _ in range(length):
-        key = output[-n:]
-        next_chars = model.get(key)
-        if not next_chars:
-            logging.warning(f"No next characters found for key '{key}'. Stopping generation.")
-            break
-        next_char = random.choice(next_chars)
-        output += next_char
+    length = max(length, 0)  # like range(length), a negative length generates nothing
+    start_id = model.key_to_id.get(seed)
+    if start_id is None:
+        logging.warning(f"No next characters found for key '{seed}'. Stopping generation.")
+        return seed
+
+    # Generated characters go into one preallocated id buffer, decoded once at the end;
+    # the seed is already a str, so it is prepended rather than re-encoded
+    out_ids = np.empty(length, dtype=np.int32)
+    uniforms = (_RNG if rng is None else np.random.default_rng(rng)).random(length)
+    if NUMBA_AVAILABLE:
+        count = _generate_ids(model.indptr, model.next_ids, model.next_keys,
+                              model.cum_probs, start_id, uniforms, out_ids)
+    else:
+        count = _generate_ids_py(model, start_id, uniforms, out_ids)
+    output = seed + model.chars[out_ids[:count]].tobytes().decode("utf-32-le", "surrogatepass")
+    if count < length:
+        logging.warning(f"No next characters found for key '{output[-n:]}'. Stopping generation.")
     
     logging.info(f"Generated text of length {len(output)} starting with seed '{seed}'")
     return output